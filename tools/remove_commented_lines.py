@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
+import io
 import os
-import re
-from typing import Tuple, List
+from typing import Callable, Dict, Iterator, Tuple, List
 
 
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -45,130 +45,228 @@ CLIKE_EXTS = {".dart", ".kt", ".kts", ".java", ".swift", ".m", ".mm", ".js", ".t
 XML_EXTS = {".xml", ".plist"}
 HASH_EXTS = {".sh", ".yaml", ".yml"}
 
+CLIKE_COMMENT_STARTS = ("//", "/*")
 
-def is_path_excluded(path: str) -> bool:
-    rel = os.path.relpath(path, PROJECT_ROOT)
-    # Normalize separators to '/'
-    rel_n = rel.replace(os.sep, "/")
-    for ex in EXCLUDE_DIRS:
-        if rel_n == ex or rel_n.startswith(ex + "/"):
-            return True
-    return False
+# A file without any of its kind's tokens cannot contain a full-line comment
+COMMENT_TOKENS = {
+    **{ext: (b"//", b"/*") for ext in CLIKE_EXTS},
+    **{ext: (b"<!--",) for ext in XML_EXTS},
+    **{ext: (b"#",) for ext in HASH_EXTS},
+}
 
 
-def remove_full_line_comments(lines: List[str], ext: str) -> Tuple[List[str], int]:
-    removed = 0
-    result: List[str] = []
+# Below this many files a process pool costs more to start than it saves
+PROCESS_POOL_MIN_FILES = 200
 
-    if ext in CLIKE_EXTS:
-        in_block = False
-        for line in lines:
-            stripped = line.lstrip()
+# Single startswith call instead of a loop over EXCLUDE_DIRS
+EXCLUDE_PREFIXES = tuple(ex + "/" for ex in EXCLUDE_DIRS)
 
-            if in_block:
-                # Check for block comment end
-                if re.search(r"\*/\s*$", stripped) or "*/" in stripped:
-                    in_block = False
-                # Entire line is within block comment → drop it
-                removed += 1
-                continue
 
-            # Full-line single-line comment (// ...)
-            if re.match(r"^\s*//", line):
-                removed += 1
-                continue
+def is_rel_excluded(rel: str) -> bool:
+    # rel is relative to PROJECT_ROOT with '/' separators
+    return rel in EXCLUDE_DIRS or rel.startswith(EXCLUDE_PREFIXES)
+
 
-            # Full-line block comment start
-            if re.match(r"^\s*/\*", line):
-                # If it also ends on same line and contains nothing else meaningful, drop this line only
-                if re.match(r"^\s*/\*.*?\*/\s*$", line):
-                    removed += 1
-                    continue
-                # Otherwise enter block and drop this line
-                in_block = True
+def iter_files(directory: str, rel_dir: str = "") -> Iterator[os.DirEntry]:
+    # rel_dir is directory relative to PROJECT_ROOT, carried down to avoid relpath per entry
+    try:
+        it = os.scandir(directory)
+    except OSError:
+        return
+    files: List[os.DirEntry] = []
+    subdirs: List[Tuple[str, str]] = []
+    with it:
+        while True:
+            # Like os.walk, a directory that fails mid-listing is skipped as a whole
+            try:
+                entry = next(it)
+            except StopIteration:
+                break
+            except OSError:
+                return
+            rel = rel_dir + "/" + entry.name if rel_dir else entry.name
+            if is_rel_excluded(rel):
+                continue
+            # Same classification as os.walk: symlinked dirs are listed but not followed
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                files.append(entry)
+                continue
+            try:
+                is_symlink = entry.is_symlink()
+            except OSError:
+                is_symlink = False
+            if not is_symlink:
+                subdirs.append((entry.path, rel))
+    # Like os.walk, finish a directory's files before descending
+    yield from files
+    for path, rel in subdirs:
+        yield from iter_files(path, rel)
+
+
+def remove_clike_comments(lines: List[str]) -> Tuple[List[str], int]:
+    removed = 0
+    result: List[str] = []
+    in_block = False
+    for line in lines:
+        if in_block:
+            # Check for block comment end (the marker has no whitespace, so no need to strip)
+            if "*/" in line:
+                in_block = False
+            # Entire line is within block comment → drop it
+            removed += 1
+            continue
+
+        # Only lines containing '/' can start a comment, so only those pay for the lstrip copy
+        if "/" in line:
+            stripped = line.lstrip()
+            # Full-line comment (// ... or /* ...), both detected with one startswith call
+            if stripped.startswith(CLIKE_COMMENT_STARTS):
                 removed += 1
+                if stripped[1] == "*":
+                    # Enter block unless it also ends on the same line
+                    body = stripped.rstrip()
+                    if len(body) < 4 or not body.endswith("*/"):
+                        in_block = True
                 continue
 
-            result.append(line)
+        result.append(line)
 
-        return result, removed
+    return result, removed
 
-    if ext in XML_EXTS:
-        in_block = False
-        for line in lines:
-            stripped = line.strip()
-
-            if in_block:
-                if "-->" in stripped:
-                    in_block = False
-                removed += 1
-                continue
 
-            # Full-line XML comment
+def remove_xml_comments(lines: List[str]) -> Tuple[List[str], int]:
+    removed = 0
+    result: List[str] = []
+    in_block = False
+    for line in lines:
+        if in_block:
+            if "-->" in line:
+                in_block = False
+            removed += 1
+            continue
+
+        # Full-line XML comment
+        if "<!--" in line:
+            stripped = line.strip()
             if stripped.startswith("<!--"):
-                if stripped.endswith("-->"):
-                    removed += 1
-                    continue
-                in_block = True
+                if not stripped.endswith("-->"):
+                    in_block = True
                 removed += 1
                 continue
 
-            result.append(line)
-        return result, removed
+        result.append(line)
+    return result, removed
+
 
-    if ext in HASH_EXTS:
-        for line in lines:
+def remove_hash_comments(lines: List[str]) -> Tuple[List[str], int]:
+    removed = 0
+    result: List[str] = []
+    for line in lines:
+        if "#" in line:
             stripped = line.lstrip()
             # Preserve shebangs in shell scripts
-            if stripped.startswith("#!"):
-                result.append(line)
-                continue
-            if re.match(r"^\s*#", line):
+            if stripped.startswith("#") and not stripped.startswith("#!"):
                 removed += 1
                 continue
-            result.append(line)
-        return result, removed
+        result.append(line)
+    return result, removed
+
+
+# One dict lookup per file instead of a chain of set membership tests
+HANDLERS: Dict[str, Callable[[List[str]], Tuple[List[str], int]]] = {
+    **{ext: remove_clike_comments for ext in CLIKE_EXTS},
+    **{ext: remove_xml_comments for ext in XML_EXTS},
+    **{ext: remove_hash_comments for ext in HASH_EXTS},
+}
+
 
-    # Default passthrough for other files (should not happen due to filter)
-    return lines, 0
+def process_file(path: str, ext: str) -> Tuple[int, int]:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return 0, 0
 
+    # Cheap byte scan first: most files have nothing to remove, so skip decoding them
+    if not any(token in data for token in COMMENT_TOKENS.get(ext, ())):
+        return 0, 0
 
-def process_file(path: str) -> Tuple[int, int]:
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            original_lines = f.readlines()
-    except (UnicodeDecodeError, OSError):
+        # newline=None gives the same universal-newline handling as text-mode readlines
+        original_lines = io.StringIO(data.decode("utf-8"), newline=None).readlines()
+    except UnicodeDecodeError:
         return 0, 0
 
-    ext = os.path.splitext(path)[1].lower()
-    new_lines, removed = remove_full_line_comments(original_lines, ext)
+    new_lines, removed = HANDLERS[ext](original_lines)
     if removed > 0:
         try:
+            # One contiguous write instead of writelines' per-line write calls
+            new_text = "".join(new_lines)
             with open(path, "w", encoding="utf-8") as f:
-                f.writelines(new_lines)
+                f.write(new_text)
         except OSError:
             return 0, 0
     return (1 if removed > 0 else 0), removed
 
 
+def process_aliases(aliases: List[Tuple[str, str]]) -> Tuple[int, int]:
+    # Every (path, ext) that reaches one file, run in walk order within a single task
+    files_changed = 0
+    lines_removed = 0
+    for path, ext in aliases:
+        changed, removed = process_file(path, ext)
+        files_changed += changed
+        lines_removed += removed
+    return files_changed, lines_removed
+
+
+def group_aliases(paths: List[str], exts: List[str]) -> List[List[Tuple[str, str]]]:
+    groups: Dict[object, List[Tuple[str, str]]] = {}
+    for path, ext in zip(paths, exts):
+        try:
+            st = os.stat(path)
+            key: object = (st.st_dev, st.st_ino)
+        except OSError:
+            key = path
+        groups.setdefault(key, []).append((path, ext))
+    return list(groups.values())
+
+
+def map_files(paths: List[str], exts: List[str]) -> List[Tuple[int, int]]:
+    # Process pool only for large trees on multi-core machines; otherwise run in-line
+    if len(paths) < PROCESS_POOL_MIN_FILES or (os.cpu_count() or 1) < 2:
+        return list(map(process_file, paths, exts))
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Symlinks and hard links can reach one file from several paths; keeping those in one
+    # task stops workers racing on it and applies each path's pass in walk order
+    with ProcessPoolExecutor() as ex:
+        return list(ex.map(process_aliases, group_aliases(paths, exts), chunksize=64))
+
+
 def main() -> None:
+    paths: List[str] = []
+    exts: List[str] = []
+    # Excluded paths are filtered inside iter_files so we never descend into them
+    for entry in iter_files(PROJECT_ROOT):
+        name = entry.name
+        # Same result as os.path.splitext(name)[1], which ignores leading dots
+        i = name.rfind(".")
+        ext = name[i:].lower() if i > 0 and (name[0] != "." or name[:i].strip(".")) else ""
+        if ext not in INCLUDED_EXTENSIONS:
+            continue
+        paths.append(entry.path)
+        exts.append(ext)
+
     files_changed = 0
     lines_removed = 0
-    for root, dirs, files in os.walk(PROJECT_ROOT):
-        # Skip excluded dirs
-        # We modify dirs in-place to prevent descending into them
-        dirs[:] = [d for d in dirs if not is_path_excluded(os.path.join(root, d))]
-
-        for name in files:
-            ext = os.path.splitext(name)[1].lower()
-            if ext not in INCLUDED_EXTENSIONS:
-                continue
-            full_path = os.path.join(root, name)
-            if is_path_excluded(full_path):
-                continue
-            changed, removed = process_file(full_path)
-            files_changed += changed
-            lines_removed += removed
+    for changed, removed in map_files(paths, exts):
+        files_changed += changed
+        lines_removed += removed
 
     print(f"Files changed: {files_changed}")
     print(f"Comment-only lines removed: {lines_removed}")
@@ -5,6 +5,13 @@ import os
 import re
 import sys
 from pathlib import Path
+from typing import Iterator
+
+try:
+    # Optional: google-re2 gives linear-time DFA matching with the same API as re
+    import re2 as re_engine
+except ImportError:
+    re_engine = re
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -25,14 +32,26 @@ LINE_COMMENT_EXTS = {
 
 XML_LIKE_EXTS = {".xml", ".plist", ".html"}
 
+# Below this many files a process pool costs more to start than it saves
+PROCESS_POOL_MIN_FILES = 200
+
+
+LINE_COMMENT_PREFIXES = ("//", "#", "!", ";")
+
+# Everything str.isspace() accepts, spelled out as literal chars: RE2's \s is ASCII-only
+# and it does not understand \u escapes, so this keeps both engines in agreement
+WHITESPACE = "\t\n\x0b\x0c\r\x1c-\x1f \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000"
 
-RE_LINE_COMMENT = re.compile(r"^\s*(//|#|!|;).*$")
-RE_XML_SINGLE_LINE_COMMENT = re.compile(r"^\s*<!--.*-->\s*$")
+RE_XML_SINGLE_LINE_COMMENT = re_engine.compile(f"^[{WHITESPACE}]*<!--.*-->[{WHITESPACE}]*$")
 
+# A file without any of its kind's tokens cannot contain a full-line comment
+LINE_COMMENT_TOKENS = (b"//", b"#", b"!", b";")
+XML_COMMENT_TOKENS = (b"<!--",)
 
-def is_text_file(path: Path) -> bool:
+
+def is_text_file(path: str | Path) -> bool:
     try:
-        with path.open("rb") as f:
+        with open(path, "rb") as f:
             chunk = f.read(4096)
         # Heuristically consider binary if NUL byte present
         return b"\x00" not in chunk
@@ -62,70 +81,139 @@ def should_skip_dir(path: Path) -> bool:
     return False
 
 
-def process_file(path: Path) -> bool:
-    ext = path.suffix.lower()
+def iter_files(directory: str) -> Iterator[os.DirEntry]:
+    try:
+        it = os.scandir(directory)
+    except OSError:
+        return
+    files: list[os.DirEntry] = []
+    subdirs: list[str] = []
+    with it:
+        while True:
+            # Like os.walk, a directory that fails mid-listing is skipped as a whole
+            try:
+                entry = next(it)
+            except StopIteration:
+                break
+            except OSError:
+                return
+            # Same classification as os.walk: symlinked dirs are listed but not followed
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if not is_dir:
+                files.append(entry)
+                continue
+            try:
+                is_symlink = entry.is_symlink()
+            except OSError:
+                is_symlink = False
+            if not is_symlink and not should_skip_dir(Path(entry.path)):
+                subdirs.append(entry.path)
+    # Like os.walk, finish a directory's files before descending
+    yield from files
+    for path in subdirs:
+        yield from iter_files(path)
+
+
+def process_file(path: Path, ext: str) -> bool:
     changed = False
 
     # Some files have multi-part extensions like .gradle.kts
     if not ext and path.name.endswith(".gradle.kts"):
         ext = ".gradle.kts"
 
+    if ext in LINE_COMMENT_EXTS:
+        tokens = LINE_COMMENT_TOKENS
+    elif ext in XML_LIKE_EXTS:
+        tokens = XML_COMMENT_TOKENS
+    else:
+        return False
+
     try:
-        text = path.read_text(encoding="utf-8")
-    except Exception:
+        data = path.read_bytes()
+    except OSError:
         return False
 
-    lines = text.splitlines(keepends=True)
+    # Cheap substring scan first: files without any marker are never decoded
+    if not any(token in data for token in tokens):
+        return False
 
-    if ext in LINE_COMMENT_EXTS:
-        filtered = [ln for ln in lines if not RE_LINE_COMMENT.match(ln)]
-        if filtered != lines:
-            path.write_text("".join(filtered), encoding="utf-8")
-            changed = True
+    try:
+        # Same newline translation read_text would apply
+        text = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    except UnicodeDecodeError:
+        return False
 
-    if ext in XML_LIKE_EXTS:
+    lines = text.splitlines(keepends=True)
+    if ext in LINE_COMMENT_EXTS:
+        filtered = [ln for ln in lines if not ln.lstrip().startswith(LINE_COMMENT_PREFIXES)]
+    else:
         # Only remove single-line comment-only nodes; do not attempt multi-line blocks
-        filtered = []
-        removed_any = False
-        for ln in lines:
-            if RE_XML_SINGLE_LINE_COMMENT.match(ln):
-                removed_any = True
-            else:
-                filtered.append(ln)
-        if removed_any:
-            path.write_text("".join(filtered), encoding="utf-8")
-            changed = True
+        filtered = [ln for ln in lines if not RE_XML_SINGLE_LINE_COMMENT.match(ln)]
+    # Lines are only ever dropped, so a length change means something was removed
+    if len(filtered) != len(lines):
+        path.write_text("".join(filtered), encoding="utf-8")
+        changed = True
 
     return changed
 
 
+def process_aliases(aliases: list[tuple[Path, str]]) -> int:
+    # Every (path, ext) that reaches one file, run in walk order within a single task
+    return sum(process_file(path, ext) for path, ext in aliases)
+
+
+def group_aliases(paths: list[Path], exts: list[str]) -> list[list[tuple[Path, str]]]:
+    groups: dict[object, list[tuple[Path, str]]] = {}
+    for path, ext in zip(paths, exts):
+        try:
+            st = os.stat(path)
+            key: object = (st.st_dev, st.st_ino)
+        except OSError:
+            key = path
+        groups.setdefault(key, []).append((path, ext))
+    return list(groups.values())
+
+
+def map_files(paths: list[Path], exts: list[str]) -> list[int]:
+    # Process pool only for large trees on multi-core machines; otherwise run in-line
+    if len(paths) < PROCESS_POOL_MIN_FILES or (os.cpu_count() or 1) < 2:
+        return list(map(process_file, paths, exts))
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Symlinks and hard links can reach one file from several paths; keeping those in one
+    # task stops workers racing on it and applies each path's pass in walk order
+    with ProcessPoolExecutor() as ex:
+        return list(ex.map(process_aliases, group_aliases(paths, exts), chunksize=64))
+
+
 def main() -> int:
     root = ROOT
     if len(sys.argv) > 1:
         root = Path(sys.argv[1]).resolve()
 
-    changed_count = 0
-    file_count = 0
-
-    for dirpath, dirnames, filenames in os.walk(root):
-        current_dir = Path(dirpath)
-        # Prune unwanted directories in-place
-        pruned = []
-        for d in list(dirnames):
-            dpath = current_dir / d
-            if should_skip_dir(dpath):
-                dirnames.remove(d)
-                pruned.append(d)
-        # Process files
-        for name in filenames:
-            path = current_dir / name
-            # Only process likely text files and known extensions
-            if not is_text_file(path):
-                continue
-            if (path.suffix.lower() in LINE_COMMENT_EXTS) or (path.suffix.lower() in XML_LIKE_EXTS) or name.endswith(".gradle.kts"):
-                file_count += 1
-                if process_file(path):
-                    changed_count += 1
+    paths: list[Path] = []
+    exts: list[str] = []
+
+    # Unwanted directories are pruned inside iter_files
+    for entry in iter_files(str(root)):
+        name = entry.name
+        # Same result as Path(name).suffix, without building a Path for every entry
+        i = name.rfind(".")
+        ext = name[i:].lower() if 0 < i < len(name) - 1 else ""
+        # Only process known extensions, and of those only likely text files.
+        # The extension test is free, so it runs first and spares most files the open + read.
+        if not ((ext in LINE_COMMENT_EXTS) or (ext in XML_LIKE_EXTS) or name.endswith(".gradle.kts")):
+            continue
+        if not is_text_file(entry.path):
+            continue
+        paths.append(Path(entry.path))
+        exts.append(ext)
+
+    changed_count = sum(map_files(paths, exts))
+    file_count = len(paths)
 
     print(f"Processed {file_count} files; modified {changed_count} files.")
     return 0